@@ -4,7 +4,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import logging
+import os
 
 # Logging configuration
 logging.basicConfig(
@@ -14,8 +16,29 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class AmazonAnalyzer:
+    # Only the columns used by the analyses, with explicit dtypes to skip inference.
+    # Arrow-backed strings send the .str cleanup to Arrow's compute kernels
+    _USECOLS = ['product_name', 'category', 'discounted_price',
+                'actual_price', 'rating', 'rating_count']
+    _DTYPES = {
+        'product_name': 'string[pyarrow]',
+        'category': 'category',  # group-bys then hash integer codes, not long paths
+        'discounted_price': 'string[pyarrow]',
+        'actual_price': 'string[pyarrow]',
+        'rating': 'string[pyarrow]',
+        'rating_count': 'string[pyarrow]'
+    }
+    # Rows parsed per chunk; raw price/rating strings only live for one chunk
+    _CHUNKSIZE = 200_000
+    # Part of the cache file name; bump whenever the cleaned columns or dtypes change
+    _CACHE_VERSION = 2
+
     def __init__(self):
         self.data_path = Path('data/amazon_sales.csv')
+        self.cache_path = self.data_path.with_name(
+            f"{self.data_path.stem}.v{self._CACHE_VERSION}.parquet")
+        self._df = None  # cleaned data, loaded once per analyzer
+        self.cache_ready = False  # True once the cleaned data is in the Parquet cache
         self.output_dir = Path('graphs')  # Changed from 'grafici' to 'graphs'
         self.output_dir.mkdir(exist_ok=True)
         
@@ -43,6 +66,10 @@ class AmazonAnalyzer:
         }
         
         self.INR_TO_EUR = 0.011
+        
+        # Leaf labels of category paths, shared by the category charts rendered
+        # by this analyzer
+        self.category_labels = {}
 
     def set_bar_plot_style(self, ax):
         """Sets consistent style for bar plots"""
@@ -52,33 +79,132 @@ class AmazonAnalyzer:
         ax.tick_params(axis='y', length=0)
         ax.set_axisbelow(True)
 
+    def top_category_means(self, df, col, n=15):
+        """Returns the n categories with the highest mean of col, in ascending order"""
+        means = df.groupby('category', sort=False, observed=True)[col].mean()
+        values = means.to_numpy()
+        
+        # Partial selection of the top n, then sort only those for display
+        if len(values) > n:
+            idx = np.argpartition(-values, n)[:n]
+        else:
+            idx = np.arange(len(values))
+        idx = idx[np.argsort(values[idx])]
+        return means.iloc[idx]
+
+    def top_rows(self, df, col, n, ascending=False):
+        """Returns the n rows with the largest col, ordered like nlargest"""
+        values = df[col].to_numpy()
+        
+        # NaNs rank below every value, as with nlargest
+        valid = np.flatnonzero(~np.isnan(values))
+        valid_values = values[valid]
+        
+        # Partial selection of the n-th largest value; every row reaching it is a
+        # candidate so ties resolve to the first rows, as with nlargest
+        if len(valid) > n:
+            threshold = -np.partition(-valid_values, n - 1)[n - 1]
+            idx = valid[valid_values >= threshold]
+        else:
+            idx = valid
+        idx = idx[np.argsort(-values[idx], kind='stable')][:n]
+        if len(idx) < n:
+            # Too few values: nlargest fills up with the NaN rows, in row order
+            idx = np.concatenate([idx, np.flatnonzero(np.isnan(values))[:n - len(idx)]])
+        if ascending:
+            idx = idx[::-1]
+        return df.iloc[idx]
+
+    def leaf_labels(self, categories):
+        """Returns the last component of each category path"""
+        categories = pd.Index(categories)
+        missing = categories[~categories.isin(self.category_labels.keys())].unique()
+        if len(missing):
+            leaves = missing.to_series().str.rsplit('|', n=1).str[-1]
+            self.category_labels.update(zip(missing, leaves))
+        return [self.category_labels[cat] for cat in categories]
+
+    def clean_prices(self, df):
+        """Parses the INR price columns and derives EUR prices and discount"""
+        for col in ['actual_price', 'discounted_price']:
+            prices = df[col] if pd.api.types.is_string_dtype(df[col]) else df[col].astype(str)
+            df[col] = pd.to_numeric(
+                prices.str.replace(r'[₹,]', '', regex=True),
+                errors='coerce'
+            ).to_numpy(dtype=float, na_value=np.nan)
+        actual = df['actual_price'].to_numpy()
+        discounted = df['discounted_price'].to_numpy()
+        
+        # Derived columns are float32 to halve the bytes moved by the analyses
+        df['actual_price_eur'] = (actual * self.INR_TO_EUR).astype(np.float32)
+        df['discounted_price_eur'] = (discounted * self.INR_TO_EUR).astype(np.float32)
+        
+        # A zero actual price gives inf/NaN, as the pandas arithmetic did, without warnings
+        with np.errstate(divide='ignore', invalid='ignore'):
+            discount = np.subtract(actual, discounted)
+            np.divide(discount, actual, out=discount)
+            np.multiply(discount, 100, out=discount)
+        df['discount_actual'] = np.round(discount.astype(np.float32), 2)
+
+    def clean_chunk(self, df):
+        """Cleans a chunk of raw rows read from the CSV"""
+        # Price cleaning
+        self.clean_prices(df)
+        
+        # Rating and review cleaning
+        # Ratings stay float64: float32 values of 1-decimal ratings fall across the 0.1 bin edges
+        df['rating'] = pd.to_numeric(df['rating'], errors='coerce').astype(float)
+        df['rating_count'] = pd.to_numeric(df['rating_count'], errors='coerce').astype(np.float32)
+        
+        # Handle missing values
+        df['rating'] = df['rating'].fillna(0)
+        df['rating_count'] = df['rating_count'].fillna(0)
+        return df
+
+    def write_cache(self, df):
+        """Writes the cleaned data to the Parquet cache, returns True on success"""
+        # Write to a temporary file and swap it in, so readers never see a partial cache
+        tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        try:
+            df.to_parquet(tmp_path, compression='snappy')
+            os.replace(tmp_path, self.cache_path)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not write cache {self.cache_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return False
+
     def load_and_clean_data(self):
         """Loads and cleans the dataset"""
+        if self._df is not None:
+            return self._df
+        
         try:
-            df = pd.read_csv(self.data_path)
-            logger.info(f"Data loaded. Shape: {df.shape}")
-            
-            # Price cleaning
-            for col in ['actual_price', 'discounted_price']:
-                df[col] = pd.to_numeric(
-                    df[col].astype(str).str.replace('₹', '').str.replace(',', ''), 
-                    errors='coerce'
-                )
-                df[f"{col}_eur"] = df[col] * self.INR_TO_EUR
-            
-            # Rating and review cleaning
-            df['rating'] = pd.to_numeric(df['rating'], errors='coerce')
-            df['rating_count'] = pd.to_numeric(df['rating_count'], errors='coerce')
+            # Reuse the cleaned data if the cache is newer than the CSV
+            if (self.cache_path.exists() and
+                    self.cache_path.stat().st_mtime >= self.data_path.stat().st_mtime):
+                try:
+                    self._df = pd.read_parquet(self.cache_path)
+                    self.cache_ready = True
+                    logger.info(f"Cleaned data loaded from cache. Shape: {self._df.shape}")
+                    return self._df
+                except Exception as e:
+                    logger.warning(f"Could not read cache {self.cache_path}, parsing CSV: {e}")
             
-            # Handle missing values
-            df['rating'] = df['rating'].fillna(0)
-            df['rating_count'] = df['rating_count'].fillna(0)
+            chunks = pd.read_csv(self.data_path,
+                                 usecols=self._USECOLS,
+                                 dtype=self._DTYPES,
+                                 engine='c',
+                                 chunksize=self._CHUNKSIZE)
+            df = pd.concat((self.clean_chunk(chunk) for chunk in chunks),
+                           ignore_index=True)
             
-            # Calculate discount
-            df['discount_actual'] = ((df['actual_price'] - df['discounted_price']) / 
-                                   df['actual_price'] * 100).round(2)
+            # Each chunk has its own set of categories, unify them after concatenation
+            df['category'] = df['category'].astype('category')
+            logger.info(f"Data loaded and cleaned. Shape: {df.shape}")
             
-            logger.info("Data cleaning completed")
+            self.cache_ready = self.write_cache(df)
+            self._df = df
             return df
             
         except Exception as e:
@@ -90,7 +216,7 @@ class AmazonAnalyzer:
         try:
             plt.tight_layout(pad=3.0)
             file_path = self.output_dir / f"{name}.png"
-            plt.savefig(file_path, bbox_inches='tight', dpi=300)
+            plt.savefig(file_path, bbox_inches='tight', dpi=150)
             plt.close('all')
             logger.info(f"✓ Saved: {file_path}")
             return True
@@ -101,17 +227,21 @@ class AmazonAnalyzer:
 
     def analyze_price_distribution(self, df):
         """Analyzes price distribution"""
+        prices = df['actual_price_eur'].to_numpy()
+        
         fig = plt.figure(figsize=(15, 12))
         gs = plt.GridSpec(2, 1, height_ratios=[1, 1.5])
         ax1 = fig.add_subplot(gs[0])
         ax2 = fig.add_subplot(gs[1])
         
         # Price distribution
-        ax1.hist(df['actual_price_eur'], 
-                bins=50, 
-                color=self.colors['histogram'],
-                edgecolor='black',
-                alpha=0.8)
+        counts, edges = np.histogram(prices[np.isfinite(prices)], bins=50)
+        ax1.bar(edges[:-1], counts,
+               width=np.diff(edges),
+               align='edge',
+               color=self.colors['histogram'],
+               edgecolor='black',
+               alpha=0.8)
         ax1.set_title('Price Distribution', pad=20)
         ax1.set_xlabel('Price (EUR)')
         ax1.set_ylabel('Number of Products')
@@ -119,8 +249,7 @@ class AmazonAnalyzer:
         ax1.grid(True, alpha=0.3)
         
         # Top 15 most expensive categories
-        top_prices = df.groupby('category')['actual_price_eur'].mean().nlargest(15)
-        top_prices = top_prices.sort_values(ascending=True)
+        top_prices = self.top_category_means(df, 'actual_price_eur')
         
         bars = ax2.barh(range(len(top_prices)), 
                        top_prices.values,
@@ -129,15 +258,13 @@ class AmazonAnalyzer:
                        height=0.7)
         
         ax2.set_yticks(range(len(top_prices)))
-        ax2.set_yticklabels([cat.split('|')[-1] for cat in top_prices.index],
+        ax2.set_yticklabels(self.leaf_labels(top_prices.index),
                           fontsize=9)
         
-        for i, bar in enumerate(bars):
-            width = bar.get_width()
-            ax2.text(width * 1.02, bar.get_y() + bar.get_height()/2,
-                    f'€{width:,.2f}',
-                    va='center',
-                    fontsize=9)
+        ax2.bar_label(bars,
+                     labels=[f'€{price:,.2f}' for price in top_prices.values],
+                     padding=3,
+                     fontsize=9)
         
         ax2.set_title('Top 15 Most Expensive Categories', pad=20)
         ax2.set_xlabel('Average Price (EUR)')
@@ -148,6 +275,10 @@ class AmazonAnalyzer:
 
     def analyze_ratings(self, df):
         """Detailed rating analysis"""
+        ratings = df['rating'].to_numpy()
+        rating_counts = df['rating_count'].to_numpy()
+        prices = df['actual_price_eur'].to_numpy()
+        
         fig = plt.figure(figsize=(15, 14))
         gs = plt.GridSpec(2, 2, height_ratios=[1, 1.5])
         ax1 = fig.add_subplot(gs[0, 0])
@@ -155,13 +286,18 @@ class AmazonAnalyzer:
         ax3 = fig.add_subplot(gs[1, :])
         
         # Rating vs Review Count
-        scatter = ax1.scatter(df['rating'],
-                            df['rating_count'],
-                            s=df['rating_count']/df['rating_count'].max()*400,
+        # Empty or all-zero counts give NaN/inf sizes, as the pandas division did
+        max_count = rating_counts.max() if rating_counts.size else np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sizes = rating_counts * (400.0 / max_count)
+        scatter = ax1.scatter(ratings,
+                            rating_counts,
+                            s=sizes,
                             alpha=0.6,
-                            c=df['actual_price_eur'],
+                            c=prices,
                             cmap=self.colors['scatter_price'])
         ax1.grid(False)
+        scatter.set_rasterized(True)
         plt.colorbar(scatter, ax=ax1, label='Price (EUR)')
         ax1.set_title('Rating vs Review Count', pad=20)
         ax1.set_xlabel('Rating')
@@ -169,40 +305,40 @@ class AmazonAnalyzer:
         ax1.grid(True, alpha=0.3)
         
         # Rating Distribution
-        ax2.hist(df[df['rating'] > 0]['rating'],
-                bins=np.arange(0, 5.1, 0.1),
-                color=self.colors['bars'][2],
-                edgecolor='black',
-                alpha=0.8)
+        counts, edges = np.histogram(ratings[ratings > 0], bins=np.arange(0, 5.1, 0.1))
+        ax2.bar(edges[:-1], counts,
+               width=np.diff(edges),
+               align='edge',
+               color=self.colors['bars'][2],
+               edgecolor='black',
+               alpha=0.8)
         ax2.set_title('Detailed Rating Distribution', pad=20)
         ax2.set_xlabel('Rating')
         ax2.set_ylabel('Number of Products')
         ax2.grid(True, alpha=0.3)
         
         # Top 15 most reviewed products
-        top_reviewed = df.nlargest(15, 'rating_count').iloc[::-1]
+        top_reviewed = self.top_rows(df, 'rating_count', 15, ascending=True)
+        top_counts = top_reviewed['rating_count'].to_numpy()
         
         bars = ax3.barh(range(len(top_reviewed)),
-                       top_reviewed['rating_count'],
+                       top_counts,
                        color=self.colors['bars'],
                        alpha=0.8,
                        height=0.7)
         
         ax3.set_yticks(range(len(top_reviewed)))
-        ax3.set_yticklabels([f"{name[:40]}..." for name in top_reviewed['product_name']],
+        ax3.set_yticklabels(top_reviewed['product_name'].str.slice(0, 40).add('...').tolist(),
                           fontsize=9)
         
-        for i, (bar, rating) in enumerate(zip(bars, top_reviewed['rating'])):
-            width = bar.get_width()
-            ax3.text(width * 1.02, bar.get_y() + bar.get_height()/2,
-                    f'Rating: {rating:.1f}*',
-                    va='center',
-                    fontsize=9)
-            ax3.text(width/2, bar.get_y() + bar.get_height()/2,
-                    f'{int(width):,}',
-                    va='center',
-                    ha='center',
-                    fontsize=9)
+        ax3.bar_label(bars,
+                     labels=[f'Rating: {rating:.1f}*' for rating in top_reviewed['rating']],
+                     padding=3,
+                     fontsize=9)
+        ax3.bar_label(bars,
+                     labels=[f'{int(count):,}' for count in top_counts],
+                     label_type='center',
+                     fontsize=9)
         
         ax3.set_title('Top 15 Most Reviewed Products', pad=20)
         ax3.set_xlabel('Review Count')
@@ -213,19 +349,24 @@ class AmazonAnalyzer:
 
     def analyze_discounts(self, df):
         """Discount analysis"""
+        prices = df['actual_price_eur'].to_numpy()
+        discounts = df['discount_actual'].to_numpy()
+        ratings = df['rating'].to_numpy()
+        
         fig = plt.figure(figsize=(15, 12))
         gs = plt.GridSpec(2, 1, height_ratios=[1, 1.5])
         ax1 = fig.add_subplot(gs[0])
         ax2 = fig.add_subplot(gs[1])
         
         # Scatter plot
-        scatter = ax1.scatter(df['actual_price_eur'],
-                            df['discount_actual'],
+        scatter = ax1.scatter(prices,
+                            discounts,
                             alpha=0.6,
-                            c=df['rating'],
+                            c=ratings,
                             cmap=self.colors['scatter_rating'],
                             s=50)
         ax1.grid(False)
+        scatter.set_rasterized(True)
         plt.colorbar(scatter, ax=ax1, label='Rating')
         ax1.set_title('Discount vs Price', pad=20)
         ax1.set_xlabel('Price (EUR)')
@@ -234,8 +375,7 @@ class AmazonAnalyzer:
         ax1.grid(True, alpha=0.3)
         
         # Top 15 categories by discount
-        top_discounts = df.groupby('category')['discount_actual'].mean().nlargest(15)
-        top_discounts = top_discounts.sort_values(ascending=True)
+        top_discounts = self.top_category_means(df, 'discount_actual')
         
         bars = ax2.barh(range(len(top_discounts)),
                        top_discounts.values,
@@ -244,15 +384,13 @@ class AmazonAnalyzer:
                        height=0.7)
         
         ax2.set_yticks(range(len(top_discounts)))
-        ax2.set_yticklabels([cat.split('|')[-1] for cat in top_discounts.index],
+        ax2.set_yticklabels(self.leaf_labels(top_discounts.index),
                           fontsize=9)
         
-        for i, bar in enumerate(bars):
-            width = bar.get_width()
-            ax2.text(width * 1.02, bar.get_y() + bar.get_height()/2,
-                    f'{width:.1f}%',
-                    va='center',
-                    fontsize=9)
+        ax2.bar_label(bars,
+                     labels=[f'{discount:.1f}%' for discount in top_discounts.values],
+                     padding=3,
+                     fontsize=9)
         
         ax2.set_title('Top 15 Categories by Average Discount', pad=20)
         ax2.set_xlabel('Average Discount (%)')
@@ -261,6 +399,11 @@ class AmazonAnalyzer:
         plt.tight_layout()
         return self.save_figure('discount_analysis')
 
+def run_analysis(name, cache_path):
+    """Renders one figure in a worker process from the cleaned data cache"""
+    df = pd.read_parquet(cache_path)
+    return getattr(AmazonAnalyzer(), name)(df)
+
 def main():
     try:
         # Initialization
@@ -271,22 +414,34 @@ def main():
         df = analyzer.load_and_clean_data()
         
         # Basic statistics
+        stats = df.agg({
+            'actual_price_eur': ['mean', 'median'],
+            'discount_actual': 'mean',
+            'rating': 'mean'
+        })
         print("\n=== BASIC STATISTICS ===")
         print(f"Total products: {len(df):,}")
-        print(f"Average price: €{df['actual_price_eur'].mean():,.2f}")
-        print(f"Median price: €{df['actual_price_eur'].median():,.2f}")
-        print(f"Average discount: {df['discount_actual'].mean():.1f}%")
-        print(f"Average rating: {df['rating'].mean():.2f}")
+        print(f"Average price: €{stats.loc['mean', 'actual_price_eur']:,.2f}")
+        print(f"Median price: €{stats.loc['median', 'actual_price_eur']:,.2f}")
+        print(f"Average discount: {stats.loc['mean', 'discount_actual']:.1f}%")
+        print(f"Average rating: {stats.loc['mean', 'rating']:.2f}")
         
         # Create visualizations
         logger.info("Generating visualizations...")
-        analyzer.analyze_price_distribution(df)
-        analyzer.analyze_ratings(df)
-        analyzer.analyze_discounts(df)
+        analyses = ['analyze_price_distribution', 'analyze_ratings', 'analyze_discounts']
+        workers = min(len(analyses), os.cpu_count() or 1)
+        if analyzer.cache_ready and workers > 1:
+            # One process per figure, each reading the cleaned data from the cache
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(run_analysis, analyses,
+                                  [analyzer.cache_path] * len(analyses)))
+        else:
+            for name in analyses:
+                getattr(analyzer, name)(df)
         
         # Top products
         print("\n=== TOP 5 MOST REVIEWED PRODUCTS ===")
-        top_products = df.nlargest(5, 'rating_count')
+        top_products = analyzer.top_rows(df, 'rating_count', 5)
         for _, row in top_products.iterrows():
             print(f"\nProduct: {row['product_name'][:50]}...")
             print(f"Rating: {row['rating']:.1f}* ({row['rating_count']:,} reviews)")